@@ -7,44 +7,76 @@ This is the main entry point for the skill-swap CLI application.
 import os
 import sys
 import argparse
+import importlib
 from datetime import datetime
 
 # Add the parent directory to the Python path
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, parent_dir)
 
-# Import modules
+# Import modules; command modules are imported on dispatch only when needed
+from lib import __version__
 from lib import db
-from lib import auth
-from lib import user
-from lib import skill
-from lib import request
-from lib import review
-from lib import utils
-
-def setup_parser():
-    """Set up the command line argument parser."""
-    parser = argparse.ArgumentParser(
-        description="Skill Swap - A CLI for exchanging skills",
-        prog="skill_swap"
-    )
-    
-    subparsers = parser.add_subparsers(dest="command", help="Command to run")
-    
-    # Register command
-    register_parser = subparsers.add_parser("register", help="Register a new user")
-    
-    # Login command
-    login_parser = subparsers.add_parser("login", help="Login to the system")
-    
-    # Logout command
-    logout_parser = subparsers.add_parser("logout", help="Logout from the system")
+
+# Service request statuses, and the ones a request can be updated to
+_REQUEST_STATUSES = ("pending", "accepted", "rejected", "completed", "cancelled")
+_UPDATE_STATUSES = _REQUEST_STATUSES[1:]
+
+def _sniff_subcommand(argv):
+    """
+    Find the command named on the command line without parsing it.
     
-    # User commands
+    Args:
+        argv (list): The command line arguments (without the program name)
+        
+    Returns:
+        str: The command name, or None if no known command was given
+    """
+    for token in argv:
+        if not token.startswith("-"):
+            return token if token in _PARSER_BUILDERS else None
+    return None
+
+def _positive_int(value):
+    """Argument type for integers of at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+def _add_paging_arguments(parser):
+    """Add --page and --page-size to a list command."""
+    from lib.utils import PAGE_SIZE
+    parser.add_argument("--page", type=_positive_int, default=1, help="Page to show (default: 1)")
+    parser.add_argument("--page-size", type=_positive_int, default=PAGE_SIZE,
+                        help=f"Rows per page (default: {PAGE_SIZE})")
+
+def _add_format_argument(parser):
+    """Add --format to a list command."""
+    from lib.utils import TABLE_FORMATS
+    parser.add_argument("--format", dest="fmt", choices=TABLE_FORMATS, default="simple",
+                        help="Output format (default: simple)")
+
+def _build_register_parser(subparsers):
+    """Add the register command."""
+    subparsers.add_parser("register", help="Register a new user")
+
+def _build_login_parser(subparsers):
+    """Add the login command."""
+    subparsers.add_parser("login", help="Login to the system")
+
+def _build_logout_parser(subparsers):
+    """Add the logout command."""
+    subparsers.add_parser("logout", help="Logout from the system")
+
+def _build_user_parser(subparsers):
+    """Add the user command and its subcommands."""
     user_parser = subparsers.add_parser("user", help="User management commands")
     user_subparsers = user_parser.add_subparsers(dest="subcommand", help="User command")
     
     user_list_parser = user_subparsers.add_parser("list", help="List all users")
+    _add_paging_arguments(user_list_parser)
+    _add_format_argument(user_list_parser)
     
     user_view_parser = user_subparsers.add_parser("view", help="View user details")
     user_view_parser.add_argument("id", type=int, help="User ID to view")
@@ -52,8 +84,9 @@ def setup_parser():
     user_update_parser = user_subparsers.add_parser("update", help="Update user profile")
     
     user_delete_parser = user_subparsers.add_parser("delete", help="Delete user account")
-    
-    # Skill commands
+
+def _build_skill_parser(subparsers):
+    """Add the skill command and its subcommands."""
     skill_parser = subparsers.add_parser("skill", help="Skill management commands")
     skill_subparsers = skill_parser.add_subparsers(dest="subcommand", help="Skill command")
     
@@ -64,11 +97,15 @@ def setup_parser():
     skill_remove_parser.add_argument("id", type=int, help="Skill ID to remove")
     
     skill_list_parser = skill_subparsers.add_parser("list", help="List all skills")
+    _add_paging_arguments(skill_list_parser)
+    _add_format_argument(skill_list_parser)
     
     skill_browse_parser = skill_subparsers.add_parser("browse", help="Browse users by skill")
     skill_browse_parser.add_argument("id", type=int, help="Skill ID to browse")
-    
-    # Request commands
+    _add_format_argument(skill_browse_parser)
+
+def _build_request_parser(subparsers):
+    """Add the request command and its subcommands."""
     request_parser = subparsers.add_parser("request", help="Service request commands")
     request_subparsers = request_parser.add_subparsers(dest="subcommand", help="Request command")
     
@@ -82,23 +119,24 @@ def setup_parser():
     
     request_list_parser = request_subparsers.add_parser("list", help="List service requests")
     request_list_parser.add_argument("--user", type=int, help="Filter by user ID")
-    request_list_parser.add_argument("--status", choices=["pending", "accepted", "rejected", "completed", "cancelled"], 
-                                      help="Filter by status")
+    request_list_parser.add_argument("--status", choices=_REQUEST_STATUSES, help="Filter by status")
+    _add_paging_arguments(request_list_parser)
+    _add_format_argument(request_list_parser)
     
     request_view_parser = request_subparsers.add_parser("view", help="View a service request")
     request_view_parser.add_argument("id", type=int, help="Request ID to view")
     
     request_update_parser = request_subparsers.add_parser("update", help="Update a service request")
     request_update_parser.add_argument("id", type=int, help="Request ID to update")
-    request_update_parser.add_argument("--status", choices=["accepted", "rejected", "completed", "cancelled"], 
-                                       help="New status")
+    request_update_parser.add_argument("--status", choices=_UPDATE_STATUSES, help="New status")
     request_update_parser.add_argument("--notes", help="New notes")
     request_update_parser.add_argument("--time", help="New time (YYYY-MM-DDTHH:MM)")
     
     request_delete_parser = request_subparsers.add_parser("delete", help="Delete a service request")
     request_delete_parser.add_argument("id", type=int, help="Request ID to delete")
-    
-    # Review commands
+
+def _build_review_parser(subparsers):
+    """Add the review command and its subcommands."""
     review_parser = subparsers.add_parser("review", help="Review commands")
     review_subparsers = review_parser.add_subparsers(dest="subcommand", help="Review command")
     
@@ -112,136 +150,161 @@ def setup_parser():
     review_list_group = review_list_parser.add_mutually_exclusive_group(required=True)
     review_list_group.add_argument("--reviewer", type=int, help="Filter by reviewer ID")
     review_list_group.add_argument("--reviewee", type=int, help="Filter by reviewee ID")
-    
-    # DB commands (for admins)
+    _add_format_argument(review_list_parser)
+
+def _build_db_parser(subparsers):
+    """Add the db command (for admins) and its subcommands."""
     db_parser = subparsers.add_parser("db", help="Database management commands")
     db_subparsers = db_parser.add_subparsers(dest="subcommand", help="DB command")
     
     db_migrate_parser = db_subparsers.add_parser("migrate", help="Run database migrations")
     db_seed_parser = db_subparsers.add_parser("seed", help="Run database seeds")
-    
-    return parser
 
-def main():
-    """Main entry point for the application."""
-    parser = setup_parser()
-    args = parser.parse_args()
+# Subparser builders, in the order they appear in --help
+_PARSER_BUILDERS = {
+    "register": _build_register_parser,
+    "login": _build_login_parser,
+    "logout": _build_logout_parser,
+    "user": _build_user_parser,
+    "skill": _build_skill_parser,
+    "request": _build_request_parser,
+    "review": _build_review_parser,
+    "db": _build_db_parser,
+}
+
+def setup_parser(argv=None):
+    """
+    Set up the command line argument parser.
     
-    # Initialize DB connection
-    try:
-        db.init_db()
-    except Exception as e:
-        print(f"Error connecting to database: {e}")
-        print("Make sure PostgreSQL is running and the .env file is configured correctly.")
-        sys.exit(1)
+    Only the subparser tree for the command named in argv is built. When no
+    known command is given (e.g. --help or a typo), every tree is built so
+    help and error messages list all commands.
     
-    # Handle commands
-    if not args.command:
-        parser.print_help()
-        return
+    Args:
+        argv (list, optional): The command line arguments, defaults to sys.argv[1:]
+        
+    Returns:
+        argparse.ArgumentParser: The configured parser
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    
+    parser = argparse.ArgumentParser(
+        description="Skill Swap - A CLI for exchanging skills",
+        prog="skill_swap"
+    )
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    
+    subparsers = parser.add_subparsers(dest="command", help="Command to run")
     
+    command = _sniff_subcommand(argv)
+    if command:
+        _PARSER_BUILDERS[command](subparsers)
+    else:
+        for build in _PARSER_BUILDERS.values():
+            build(subparsers)
+    
+    return parser
+
+def _db_migrate():
+    """Run database migrations and report the outcome."""
+    if db.run_migrations():
+        print("Migrations completed successfully")
+    else:
+        print("Migration failed")
+
+def _db_seed():
+    """Run database seeds and report the outcome."""
+    if db.run_seeds():
+        print("Seeds completed successfully")
+    else:
+        print("Seeding failed")
+
+def _list_reviews(reviewer, reviewee, fmt):
+    """List reviews by reviewer or by reviewee, whichever was given."""
+    from lib import review
+    if reviewer:
+        review.list_reviews_by_reviewer(reviewer, fmt)
+    elif reviewee:
+        review.list_reviews_by_reviewee(reviewee, fmt)
+
+# Command dispatch table. Keys are a command or a (command, subcommand) pair;
+# values are (module, function, names of the parsed arguments to pass). A module
+# of None refers to a helper in this file. Modules are imported on dispatch.
+_DISPATCH = {
     # DB Commands
-    if args.command == "db":
-        if not args.subcommand:
-            print("Please specify a db subcommand")
-            return
-            
-        if args.subcommand == "migrate":
-            if db.run_migrations():
-                print("Migrations completed successfully")
-            else:
-                print("Migration failed")
-                
-        elif args.subcommand == "seed":
-            if db.run_seeds():
-                print("Seeds completed successfully")
-            else:
-                print("Seeding failed")
-        
+    ("db", "migrate"): (None, "_db_migrate", ()),
+    ("db", "seed"): (None, "_db_seed", ()),
+    
     # Auth Commands
-    elif args.command == "register":
-        user.register_user()
-        
-    elif args.command == "login":
-        user.login_user()
-        
-    elif args.command == "logout":
-        auth.logout()
+    "register": ("lib.user", "register_user", ()),
+    "login": ("lib.user", "login_user", ()),
+    "logout": ("lib.auth", "logout", ()),
     
     # User Commands
-    elif args.command == "user":
-        if not args.subcommand:
-            print("Please specify a user subcommand")
-            return
-            
-        if args.subcommand == "list":
-            user.list_users()
-            
-        elif args.subcommand == "view":
-            user.view_user(args.id)
-            
-        elif args.subcommand == "update":
-            user.update_user()
-            
-        elif args.subcommand == "delete":
-            user.delete_user()
+    ("user", "list"): ("lib.user", "list_users", ("page", "page_size", "fmt")),
+    ("user", "view"): ("lib.user", "view_user", ("id",)),
+    ("user", "update"): ("lib.user", "update_user", ()),
+    ("user", "delete"): ("lib.user", "delete_user", ()),
     
     # Skill Commands
-    elif args.command == "skill":
-        if not args.subcommand:
-            print("Please specify a skill subcommand")
-            return
-            
-        if args.subcommand == "add":
-            skill.add_skill(args.name)
-            
-        elif args.subcommand == "remove":
-            skill.remove_skill(args.id)
-            
-        elif args.subcommand == "list":
-            skill.list_skills()
-            
-        elif args.subcommand == "browse":
-            skill.browse_users_by_skill(args.id)
+    ("skill", "add"): ("lib.skill", "add_skill", ("name",)),
+    ("skill", "remove"): ("lib.skill", "remove_skill", ("id",)),
+    ("skill", "list"): ("lib.skill", "list_skills", ("page", "page_size", "fmt")),
+    ("skill", "browse"): ("lib.skill", "browse_users_by_skill", ("id", "fmt")),
     
     # Request Commands
-    elif args.command == "request":
-        if not args.subcommand:
-            print("Please specify a request subcommand")
-            return
-            
-        if args.subcommand == "create":
-            request.create_request(
-                args.provider, args.skill, args.time,
-                args.duration, args.credit, args.notes
-            )
-            
-        elif args.subcommand == "list":
-            request.list_requests(args.user, args.status)
-            
-        elif args.subcommand == "view":
-            request.view_request(args.id)
-            
-        elif args.subcommand == "update":
-            request.update_request(args.id, args.status, args.notes, args.time)
-            
-        elif args.subcommand == "delete":
-            request.delete_request(args.id)
+    ("request", "create"): ("lib.request", "create_request",
+                            ("provider", "skill", "time", "duration", "credit", "notes")),
+    ("request", "list"): ("lib.request", "list_requests",
+                          ("user", "status", "page", "page_size", "fmt")),
+    ("request", "view"): ("lib.request", "view_request", ("id",)),
+    ("request", "update"): ("lib.request", "update_request", ("id", "status", "notes", "time")),
+    ("request", "delete"): ("lib.request", "delete_request", ("id",)),
     
     # Review Commands
-    elif args.command == "review":
-        if not args.subcommand:
-            print("Please specify a review subcommand")
-            return
-            
-        if args.subcommand == "add":
-            review.add_review(args.request, args.rating, args.comments)
-            
-        elif args.subcommand == "list":
-            if args.reviewer:
-                review.list_reviews_by_reviewer(args.reviewer)
-            elif args.reviewee:
-                review.list_reviews_by_reviewee(args.reviewee)
+    ("review", "add"): ("lib.review", "add_review", ("request", "rating", "comments")),
+    ("review", "list"): (None, "_list_reviews", ("reviewer", "reviewee", "fmt")),
+}
+
+# Commands that need a database connection; logout only clears the session file
+_DB_COMMANDS = frozenset({"register", "login", "user", "skill", "request", "review", "db"})
+
+def main():
+    """Main entry point for the application."""
+    argv = sys.argv[1:]
+    
+    # Answer --version before building the parser or touching the database
+    if argv == ["--version"]:
+        print(f"skill_swap {__version__}")
+        return
+    
+    parser = setup_parser(argv)
+    args = parser.parse_args(argv)
+    
+    # Handle commands
+    if not args.command:
+        parser.print_help()
+        return
+    
+    # Initialize DB connection, only for commands that query it
+    if args.command in _DB_COMMANDS:
+        try:
+            db.init_db()
+        except Exception as e:
+            print(f"Error connecting to database: {e}")
+            print("Make sure PostgreSQL is running and the .env file is configured correctly.")
+            sys.exit(1)
+    
+    subcommand = getattr(args, "subcommand", None)
+    entry = _DISPATCH.get((args.command, subcommand)) or _DISPATCH.get(args.command)
+    if entry is None:
+        print(f"Please specify a {args.command} subcommand")
+        return
+    
+    module_name, func_name, arg_names = entry
+    module = importlib.import_module(module_name) if module_name else sys.modules[__name__]
+    getattr(module, func_name)(*[getattr(args, name) for name in arg_names])
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,24 @@
+"""unique user skills
+
+Revision ID: 2e88378e2a15
+Revises: 5180eca3d249
+Create Date: 2026-10-15 09:12:31.418207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2e88378e2a15'
+down_revision = '5180eca3d249'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('uq_user_skills_user_id_skill_id', 'user_skills', ['user_id', 'skill_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_user_skills_user_id_skill_id', table_name='user_skills')
@@ -0,0 +1,34 @@
+"""lookup indexes
+
+Revision ID: 9c4f1b7d2e60
+Revises: 2e88378e2a15
+Create Date: 2026-10-15 11:02:47.305118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4f1b7d2e60'
+down_revision = '2e88378e2a15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_user_skills_skill_id_user_id', 'user_skills', ['skill_id', 'user_id'])
+    op.create_index('ix_service_requests_requester_id_time', 'service_requests', ['requester_id', sa.text('time DESC')])
+    op.create_index('ix_service_requests_provider_id_time', 'service_requests', ['provider_id', sa.text('time DESC')])
+    op.create_index('ix_reviews_reviewee_id_created_at', 'reviews', ['reviewee_id', sa.text('created_at DESC'), 'rating'])
+    op.create_index('ix_reviews_reviewer_id_created_at', 'reviews', ['reviewer_id', sa.text('created_at DESC')])
+    op.create_index('ix_reviews_service_request_id', 'reviews', ['service_request_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reviews_service_request_id', table_name='reviews')
+    op.drop_index('ix_reviews_reviewer_id_created_at', table_name='reviews')
+    op.drop_index('ix_reviews_reviewee_id_created_at', table_name='reviews')
+    op.drop_index('ix_service_requests_provider_id_time', table_name='service_requests')
+    op.drop_index('ix_service_requests_requester_id_time', table_name='service_requests')
+    op.drop_index('ix_user_skills_skill_id_user_id', table_name='user_skills')
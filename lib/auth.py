@@ -1,17 +1,36 @@
 """
 Authentication and session management for the skill-swap application.
 """
-import bcrypt
 import os
-import json
+import inspect
+import functools
+from contextvars import ContextVar
 from . import db
 from . import utils
 
+# Project root, one level above this package
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 # Session file path
-SESSION_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.session')
+SESSION_FILE = os.path.join(_ROOT, '.session')
+
+# Login lookup
+_LOGIN_QUERY = "SELECT id, username, email, password_hash FROM users WHERE username = %s AND deleted_at IS NULL"
+
+# Service request lookup for require_request_participant, limited to
+# requests the user took part in
+_PARTICIPANT_QUERY = """
+    SELECT requester_id, provider_id, status
+    FROM service_requests
+    WHERE id = %(request_id)s AND (requester_id = %(user_id)s OR provider_id = %(user_id)s)
+"""
+
+# Session of the logged-in user, set by login() or loaded from SESSION_FILE
+# on first use, and cleared by logout()
+_current_user = ContextVar("current_user", default=None)
 
-# Global session storage
-current_session = None
+# Last session parsed from SESSION_FILE, keyed by the file's mtime
+_session_cache = {"mtime": None, "session": None}
 
 class Session:
     """Session class to store user authentication details."""
@@ -20,45 +39,54 @@ class Session:
         self.username = username
         self.email = email
         
-    def to_dict(self):
-        """Convert session to dictionary for serialization."""
-        return {
-            'user_id': self.user_id,
-            'username': self.username,
-            'email': self.email
-        }
+    def to_bytes(self):
+        """Serialize the session as NUL-separated user ID, username and email."""
+        return f"{self.user_id}\0{self.username}\0{self.email}".encode('utf-8')
         
     @classmethod
-    def from_dict(cls, data):
-        """Create session from dictionary."""
+    def from_bytes(cls, data):
+        """Create session from bytes produced by to_bytes()."""
         if not data:
             return None
-        return cls(data['user_id'], data['username'], data['email'])
+        user_id, username, email = data.decode('utf-8').split('\0')
+        return cls(int(user_id), username, email)
 
 def save_session(session):
     """Save session to file."""
     if session:
-        with open(SESSION_FILE, 'w') as f:
-            json.dump(session.to_dict(), f)
+        with open(SESSION_FILE, 'wb') as f:
+            f.write(session.to_bytes())
     else:
         # Remove session file if session is None
         if os.path.exists(SESSION_FILE):
             os.remove(SESSION_FILE)
 
 def load_session():
-    """Load session from file."""
-    global current_session
-    if os.path.exists(SESSION_FILE):
-        try:
-            with open(SESSION_FILE, 'r') as f:
-                data = json.load(f)
-            current_session = Session.from_dict(data)
-        except Exception:
-            # If there's an error loading the session, remove the file
-            os.remove(SESSION_FILE)
-            current_session = None
-    else:
-        current_session = None
+    """
+    Load session from file, reusing the last parse if the file is unchanged.
+    
+    Returns:
+        Session: The saved session, or None if there is none
+    """
+    try:
+        mtime = os.stat(SESSION_FILE).st_mtime_ns
+    except OSError:
+        return None
+    
+    if mtime == _session_cache["mtime"]:
+        return _session_cache["session"]
+    
+    try:
+        with open(SESSION_FILE, 'rb') as f:
+            session = Session.from_bytes(f.read())
+    except Exception:
+        # If there's an error loading the session, remove the file
+        os.remove(SESSION_FILE)
+        return None
+    
+    _session_cache["mtime"] = mtime
+    _session_cache["session"] = session
+    return session
 
 def login(username, password):
     """
@@ -71,14 +99,8 @@ def login(username, password):
     Returns:
         bool: True if login successful, False otherwise
     """
-    global current_session
-    
     # Query for the user
-    result = db.execute_query(
-        "SELECT id, username, email, password_hash FROM users WHERE username = %s AND deleted_at IS NULL",
-        (username,),
-        fetch=True
-    )
+    result = db.execute_query(_LOGIN_QUERY, (username,), fetch=True)
     
     if not result:
         print("Invalid username or password.")
@@ -87,14 +109,15 @@ def login(username, password):
     user_id, db_username, email, password_hash = result[0]
     
     # Check password
-    if not bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8')):
+    if not utils.check_password(password, password_hash):
         print("Invalid username or password.")
         return False
     
     # Create session
-    current_session = Session(user_id, db_username, email)
+    session = Session(user_id, db_username, email)
+    _current_user.set(session)
     # Save session to file
-    save_session(current_session)
+    save_session(session)
     print(f"Welcome back, {db_username}!")
     return True
 
@@ -112,63 +135,86 @@ def register(username, email, password, full_name=None, bio=None):
     Returns:
         bool: True if registration successful, False otherwise
     """
-    # Check if username or email already exists
-    result = db.execute_query(
-        "SELECT username FROM users WHERE username = %s OR email = %s",
-        (username, email),
-        fetch=True
-    )
-    
-    if result:
-        print("Username or email already exists.")
-        return False
-    
     # Hash the password
-    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    password_hash = utils.hash_password(password)
     
-    # Insert the new user
+    # Insert the new user; no row comes back if the username or email is taken
     try:
-        db.execute_query(
+        result = db.execute_query(
             """
             INSERT INTO users (username, email, password_hash, full_name, bio)
             VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT DO NOTHING
+            RETURNING id
             """,
-            (username, email, password_hash, full_name, bio)
+            (username, email, password_hash, full_name, bio),
+            fetch=True
         )
-        print(f"User '{username}' registered successfully!")
-        return True
     except Exception as e:
         print(f"Error registering user: {e}")
         return False
+    
+    if not result:
+        print("Username or email already exists.")
+        return False
+    
+    print(f"User '{username}' registered successfully!")
+    return True
 
 def logout():
     """Log out the current user."""
-    global current_session
-    if current_session:
-        print(f"Goodbye, {current_session.username}!")
-        current_session = None
+    session = get_current_user()
+    if session:
+        print(f"Goodbye, {session.username}!")
+        _current_user.set(None)
         # Remove session file
         save_session(None)
         return True
     return False
 
 def get_current_user():
-    """Get the current user session."""
-    global current_session
-    if current_session is None:
-        # Try to load session from file
-        load_session()
-    return current_session
+    """Get the current user session, loading it from file on first use."""
+    session = _current_user.get()
+    if session is None:
+        session = load_session()
+        _current_user.set(session)
+    return session
 
 def require_login(func):
     """Decorator to require login for a function."""
     def wrapper(*args, **kwargs):
-        global current_session
-        if current_session is None:
-            # Try to load session from file before rejecting
-            load_session()
-            if current_session is None:
-                print("You must be logged in to use this command.")
-                return False
+        if get_current_user() is None:
+            print("You must be logged in to use this command.")
+            return False
         return func(*args, **kwargs)
     return wrapper
+
+def require_request_participant(arg="request_id"):
+    """
+    Decorator to require the current user to be the requester or provider of
+    a service request.
+    
+    The request is looked up once and passed to the function as the
+    request_row keyword argument, a (requester_id, provider_id, status)
+    tuple. Use it under require_login.
+    
+    Args:
+        arg (str): The name of the function's argument holding the request ID
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            request_id = signature.bind_partial(*args, **kwargs).arguments[arg]
+            request = db.execute_query(
+                _PARTICIPANT_QUERY,
+                {"request_id": request_id, "user_id": get_current_user().user_id},
+                fetch=True
+            )
+            if not request:
+                print(f"Service request with ID {request_id} not found or you don't have access.")
+                return False
+            return func(*args, request_row=request[0], **kwargs)
+        return wrapper
+    return decorator
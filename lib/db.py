@@ -2,51 +2,176 @@
 Database connection and utilities for the skill-swap application.
 """
 import os
+import re
+import sys
+import queue
 import sqlite3
-import glob
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from alembic.config import Config
-from alembic import command
+import atexit
+import functools
+import threading
 
-# Load environment variables
-load_dotenv()
+# This package's directory and the project root
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_ROOT = os.path.dirname(_HERE)
 
 # SQLite database path
-DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'skill_swap.db')
-ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'alembic.ini')
+DB_PATH = os.path.join(_HERE, 'skill_swap.db')
+ALEMBIC_INI = os.path.join(_HERE, 'alembic.ini')
+
+# Raised when a statement violates a UNIQUE, CHECK or foreign key constraint
+IntegrityError = sqlite3.IntegrityError
+
+# Prepared statements each connection keeps, keyed by SQL text; more than
+# sqlite3's default of 128
+STATEMENT_CACHE_SIZE = 256
+
+# Idle connections, most recently used first
+_idle = queue.LifoQueue()
+
+# Slots limiting how many connections are checked out, created by
+# _get_slots() after init_db() has loaded .env
+_slots = None
+_slots_lock = threading.Lock()
 
 def init_db():
     """Initialize the database connection."""
+    from dotenv import load_dotenv
+    
+    # Load environment variables
+    load_dotenv()
+    
     # Create SQLite database if it doesn't exist
-    conn = sqlite3.connect(DB_PATH)
-    conn.close()
-    print(f"Connected to SQLite database at {DB_PATH}")
+    release_connection(get_connection())
+    # On stderr, so stdout carries only command output (e.g. --format=tsv)
+    print(f"Connected to SQLite database at {DB_PATH}", file=sys.stderr)
     return True
 
+def _connect():
+    """Open a new SQLite connection."""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False,
+                           cached_statements=STATEMENT_CACHE_SIZE)
+    # WAL with NORMAL sync avoids a full fsync on every commit
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def _pool_max_size():
+    """
+    Read the most connections open at once from SKILLSWAP_DB_POOL_MAX.
+    
+    Returns:
+        int: The pool size, 20 if the variable is not set
+        
+    Raises:
+        ValueError: If the variable is not a positive integer
+    """
+    value = os.environ.get("SKILLSWAP_DB_POOL_MAX", "20")
+    try:
+        size = int(value)
+    except ValueError:
+        size = 0
+    if size < 1:
+        raise ValueError(f"SKILLSWAP_DB_POOL_MAX must be a positive integer, got {value!r}")
+    return size
+
+def _get_slots():
+    """
+    Return the connection slots, creating them on first use.
+    
+    get_connection() waits when all SKILLSWAP_DB_POOL_MAX (default 20)
+    slots are in use.
+
+    Returns:
+        threading.BoundedSemaphore: The slots
+    """
+    global _slots
+    with _slots_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(_pool_max_size())
+        return _slots
+
 def get_connection():
-    """Get a new SQLite connection."""
-    return sqlite3.connect(DB_PATH)
+    """
+    Get a connection from the pool, opening one if none is idle.
+    
+    Every connection must be handed back with release_connection().
+    
+    Returns:
+        sqlite3.Connection: The connection
+    """
+    slots = _get_slots()
+    slots.acquire()
+    try:
+        return _idle.get_nowait()
+    except queue.Empty:
+        pass
+    try:
+        return _connect()
+    except Exception:
+        slots.release()
+        raise
 
 def release_connection(conn):
-    """Close a SQLite connection."""
-    if conn:
-        conn.close()
+    """Return a connection to the pool."""
+    _idle.put(conn)
+    _get_slots().release()
+
+def close_connections():
+    """Close all idle connections in the pool."""
+    while True:
+        try:
+            _idle.get_nowait().close()
+        except queue.Empty:
+            break
+
+atexit.register(close_connections)
+
+# Named placeholders, e.g. %(user_id)s
+_NAMED_PLACEHOLDER_RE = re.compile(r'%\((\w+)\)s')
+
+@functools.lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _sqlite_query(query):
+    """
+    Convert psycopg-style placeholders to SQLite ones: %s to ? and %(name)s
+    to :name, which is bound from a dict of parameters.
+    """
+    return _NAMED_PLACEHOLDER_RE.sub(r':\1', query).replace('%s', '?')
 
 def execute_query(query, params=None, fetch=False):
-    """Execute a database query."""
+    """
+    Execute a database query.
+    
+    sqlite3 keeps a per-connection cache of prepared statements keyed by the
+    SQL text, so a query repeated on a pooled connection is parsed and
+    planned only once. Hot queries are therefore module-level constants,
+    so the same text is passed every time.
+    
+    Constraint violations are re-raised as IntegrityError without printing,
+    so callers can report them in their own words.
+    
+    Args:
+        query (str): The SQL query, with %s or %(name)s placeholders
+        params (tuple or dict, optional): The query parameters; a dict for
+            named placeholders
+        fetch (bool): Whether to return the result rows
+        
+    Returns:
+        list: The result rows if fetch is True, otherwise the number of
+        rows affected by an INSERT, UPDATE or DELETE
+    """
     conn = get_connection()
     result = None
     try:
-        # Convert PostgreSQL placeholders (%s) to SQLite placeholders (?)
-        query = query.replace('%s', '?')
+        query = _sqlite_query(query)
         
         cur = conn.cursor()
         cur.execute(query, params or ())
-        if fetch:
-            result = cur.fetchall()
+        result = cur.fetchall() if fetch else cur.rowcount
         conn.commit()
         cur.close()
+    except IntegrityError:
+        conn.rollback()
+        raise
     except Exception as e:
         conn.rollback()
         print(f"Database error: {e}")
@@ -55,27 +180,66 @@ def execute_query(query, params=None, fetch=False):
         release_connection(conn)
     return result
 
+# PostgreSQL-specific syntax and its SQLite replacement
+_PG2SQLITE = {
+    'SERIAL PRIMARY KEY': 'INTEGER PRIMARY KEY AUTOINCREMENT',
+    'TIMESTAMP': 'TEXT',
+    'NOW()': "(datetime('now'))", # SQLite needs expression defaults parenthesised
+}
+
+# One pattern for all replacements; keywords only match as whole words
+_PG2SQLITE_RE = re.compile('|'.join(
+    (r'\b' if key[0].isalnum() else '') + re.escape(key) + (r'\b' if key[-1].isalnum() else '')
+    for key in _PG2SQLITE
+))
+
+@functools.lru_cache(maxsize=128)
+def _translate_script(script):
+    """Convert PostgreSQL-specific syntax in a SQL script to SQLite in a single pass."""
+    return _PG2SQLITE_RE.sub(lambda m: _PG2SQLITE[m.group(0)], script)
+
+def iter_query(query, params=None, batch_size=500):
+    """
+    Execute a query and yield its rows, fetching them in batches.
+    
+    Only batch_size rows are held in memory at a time, so large results can
+    be consumed without materializing them.
+    
+    Args:
+        query (str): The SQL query, with %s or %(name)s placeholders
+        params (tuple or dict, optional): The query parameters; a dict for
+            named placeholders
+        batch_size (int): The number of rows to fetch at a time
+        
+    Yields:
+        tuple: The result rows
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(_sqlite_query(query), params or ())
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    except Exception as e:
+        print(f"Database error: {e}")
+        raise
+    finally:
+        cur.close()
+        release_connection(conn)
+
 def execute_script(script_path):
     """Execute a SQL script file."""
     conn = get_connection()
     try:
         with open(script_path, 'r') as f:
-            script = f.read()
-            
-        # Convert PostgreSQL-specific syntax to SQLite
-        script = script.replace('SERIAL PRIMARY KEY', 'INTEGER PRIMARY KEY AUTOINCREMENT')
-        script = script.replace('TIMESTAMP', 'TEXT')
-        script = script.replace('NOW()', "datetime('now')")
-        script = script.replace(' CHECK ', ' ') # Simplified CHECK constraints
+            script = _translate_script(f.read())
             
-        cur = conn.cursor()
-        # Split script into individual statements
-        statements = script.split(';')
-        for statement in statements:
-            if statement.strip():
-                cur.execute(statement)
-        conn.commit()
-        cur.close()
+        # Run the whole script in one call, inside a transaction so a failing
+        # statement leaves the database untouched
+        conn.executescript(f"BEGIN;\n{script}\nCOMMIT;")
         print(f"Executed script: {script_path}")
         return True
     except Exception as e:
@@ -86,26 +250,38 @@ def execute_script(script_path):
     finally:
         release_connection(conn)
 
+def _sql_files(directory):
+    """Return the paths of the .sql files in a directory, sorted by name."""
+    return sorted(e.path for e in os.scandir(directory) if e.name.endswith('.sql'))
+
 def run_migrations():
-    """Run all migrations using Alembic."""
+    """Run all migrations using Alembic, or the legacy SQL files if Alembic is unavailable."""
     try:
-        # Load the Alembic configuration
-        alembic_cfg = Config(ALEMBIC_INI)
-        
-        # Run the migrations
-        command.upgrade(alembic_cfg, "head")
-        print("Migrations completed successfully.")
-        return True
-    except Exception as e:
-        print(f"Migration failed: {e}")
-        return False
+        # Alembic is only needed here, so keep it out of every other command's startup
+        from alembic.config import Config
+        from alembic import command
+        if not os.path.exists(ALEMBIC_INI):
+            raise FileNotFoundError(ALEMBIC_INI)
+    except (ImportError, FileNotFoundError) as e:
+        print(f"Alembic unavailable ({e}), running legacy migrations.")
+    else:
+        try:
+            # Load the Alembic configuration
+            alembic_cfg = Config(ALEMBIC_INI)
+            
+            # Run the migrations
+            command.upgrade(alembic_cfg, "head")
+            print("Migrations completed successfully.")
+            return True
+        except Exception as e:
+            print(f"Migration failed: {e}")
+            return False
         
     # Legacy migration approach as fallback
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    migration_dir = os.path.join(base_dir, 'migrations')
+    migration_dir = os.path.join(_ROOT, 'migrations')
     
     # Get all migration files in order
-    migration_files = sorted(glob.glob(os.path.join(migration_dir, '*.sql')))
+    migration_files = _sql_files(migration_dir)
     
     for migration_file in migration_files:
         print(f"Running legacy migration: {migration_file}")
@@ -117,11 +293,10 @@ def run_migrations():
 
 def run_seeds():
     """Run all seed files in order."""
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    seed_dir = os.path.join(base_dir, 'seeds')
+    seed_dir = os.path.join(_ROOT, 'seeds')
     
     # Get all seed files in order
-    seed_files = sorted(glob.glob(os.path.join(seed_dir, '*.sql')))
+    seed_files = _sql_files(seed_dir)
     
     for seed_file in seed_files:
         print(f"Running seed: {seed_file}")
@@ -1,112 +1,158 @@
 """
 SQLAlchemy models for the skill-swap application.
+
+The models are built on first attribute access (PEP 562), so importing this
+module does not import SQLAlchemy. Only the migration tooling uses the ORM;
+the CLI commands go through lib.db with raw SQL.
 """
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, CheckConstraint, create_engine, func
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
 import os
+import functools
 
-# Create the base class
-Base = declarative_base()
+# Names defined by _load()
+_MODEL_NAMES = frozenset({"Base", "User", "Skill", "UserSkill", "ServiceRequest", "Review"})
 
-class User(Base):
-    """User model for storing user account information."""
-    __tablename__ = 'users'
-    
-    id = Column(Integer, primary_key=True)
-    username = Column(String(50), unique=True, nullable=False)
-    email = Column(String(100), unique=True, nullable=False)
-    password_hash = Column(Text, nullable=False)
-    full_name = Column(String(100))
-    bio = Column(Text)
-    deleted_at = Column(DateTime, nullable=True)
-    
-    # Relationships
-    skills = relationship("UserSkill", back_populates="user", cascade="all, delete-orphan")
-    requests_as_requester = relationship("ServiceRequest", foreign_keys="ServiceRequest.requester_id", back_populates="requester")
-    requests_as_provider = relationship("ServiceRequest", foreign_keys="ServiceRequest.provider_id", back_populates="provider")
-    reviews_given = relationship("Review", foreign_keys="Review.reviewer_id", back_populates="reviewer")
-    reviews_received = relationship("Review", foreign_keys="Review.reviewee_id", back_populates="reviewee")
-
-class Skill(Base):
-    """Skill model for storing skills information."""
-    __tablename__ = 'skills'
-    
-    id = Column(Integer, primary_key=True)
-    name = Column(String(100), unique=True, nullable=False)
-    
-    # Relationships
-    users = relationship("UserSkill", back_populates="skill", cascade="all, delete-orphan")
-    service_requests = relationship("ServiceRequest", back_populates="skill")
+# This package's directory
+_HERE = os.path.dirname(os.path.abspath(__file__))
 
-class UserSkill(Base):
-    """Association table for User-Skill many-to-many relationship."""
-    __tablename__ = 'user_skills'
-    
-    id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
-    skill_id = Column(Integer, ForeignKey('skills.id', ondelete='CASCADE'), nullable=False)
-    
-    # Relationships
-    user = relationship("User", back_populates="skills")
-    skill = relationship("Skill", back_populates="users")
+# Get database URL from the database file path
+DB_PATH = os.path.join(_HERE, 'skill_swap.db')
+DATABASE_URL = f"sqlite:///{DB_PATH}"
 
-class ServiceRequest(Base):
-    """ServiceRequest model for storing service request information."""
-    __tablename__ = 'service_requests'
+def _load():
+    """Import SQLAlchemy and define the model classes."""
+    global Base, User, Skill, UserSkill, ServiceRequest, Review
+    if "Base" in globals():
+        return
     
-    id = Column(Integer, primary_key=True)
-    requester_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
-    provider_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
-    skill_id = Column(Integer, ForeignKey('skills.id'), nullable=True)
-    time = Column(DateTime, nullable=False)
-    duration = Column(Integer, nullable=False)  # in minutes
-    credit_cost = Column(Integer, nullable=False)
-    status = Column(String(20), default='pending')
-    notes = Column(Text)
-    created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
-    
-    # Add check constraint for status
-    __table_args__ = (
-        CheckConstraint(status.in_(['pending', 'accepted', 'rejected', 'completed'])),
-    )
-    
-    # Relationships
-    requester = relationship("User", foreign_keys=[requester_id], back_populates="requests_as_requester")
-    provider = relationship("User", foreign_keys=[provider_id], back_populates="requests_as_provider")
-    skill = relationship("Skill", back_populates="service_requests")
-    reviews = relationship("Review", back_populates="service_request", cascade="all, delete-orphan")
-
-class Review(Base):
-    """Review model for storing review information."""
-    __tablename__ = 'reviews'
-    
-    id = Column(Integer, primary_key=True)
-    service_request_id = Column(Integer, ForeignKey('service_requests.id', ondelete='CASCADE'), nullable=False)
-    reviewer_id = Column(Integer, ForeignKey('users.id'), nullable=False)
-    reviewee_id = Column(Integer, ForeignKey('users.id'), nullable=False)
-    rating = Column(Integer, nullable=False)
-    comments = Column(Text)
-    created_at = Column(DateTime, default=func.now())
-    
-    # Add check constraint for rating
-    __table_args__ = (
-        CheckConstraint('rating BETWEEN 1 AND 5'),
-    )
-    
-    # Relationships
-    service_request = relationship("ServiceRequest", back_populates="reviews")
-    reviewer = relationship("User", foreign_keys=[reviewer_id], back_populates="reviews_given")
-    reviewee = relationship("User", foreign_keys=[reviewee_id], back_populates="reviews_received")
+    from datetime import datetime
+    from typing import Optional
+    from sqlalchemy import String, Text, ForeignKey, DateTime, CheckConstraint, Index, func
+    from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
-# Get database URL from the database file path
-DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'skill_swap.db')
-DATABASE_URL = f"sqlite:///{DB_PATH}"
+    # Create the base class
+    class Base(DeclarativeBase):
+        pass
+
+    class User(Base):
+        """User model for storing user account information."""
+        __tablename__ = 'users'
+
+        id: Mapped[int] = mapped_column(primary_key=True)
+        username: Mapped[str] = mapped_column(String(50), unique=True)
+        email: Mapped[str] = mapped_column(String(100), unique=True)
+        password_hash: Mapped[str] = mapped_column(Text)
+        full_name: Mapped[Optional[str]] = mapped_column(String(100))
+        bio: Mapped[Optional[str]] = mapped_column(Text)
+        deleted_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+        # Relationships
+        skills = relationship("UserSkill", back_populates="user", cascade="all, delete-orphan")
+        requests_as_requester = relationship("ServiceRequest", foreign_keys="ServiceRequest.requester_id", back_populates="requester")
+        requests_as_provider = relationship("ServiceRequest", foreign_keys="ServiceRequest.provider_id", back_populates="provider")
+        reviews_given = relationship("Review", foreign_keys="Review.reviewer_id", back_populates="reviewer")
+        reviews_received = relationship("Review", foreign_keys="Review.reviewee_id", back_populates="reviewee")
+
+    class Skill(Base):
+        """Skill model for storing skills information."""
+        __tablename__ = 'skills'
+
+        id: Mapped[int] = mapped_column(primary_key=True)
+        name: Mapped[str] = mapped_column(String(100), unique=True)
+
+        # Relationships
+        users = relationship("UserSkill", back_populates="skill", cascade="all, delete-orphan")
+        service_requests = relationship("ServiceRequest", back_populates="skill")
+
+    class UserSkill(Base):
+        """Association table for User-Skill many-to-many relationship."""
+        __tablename__ = 'user_skills'
+
+        id: Mapped[int] = mapped_column(primary_key=True)
+        user_id: Mapped[int] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'))
+        skill_id: Mapped[int] = mapped_column(ForeignKey('skills.id', ondelete='CASCADE'))
+
+        # A user lists each skill at most once
+        __table_args__ = (
+            Index('uq_user_skills_user_id_skill_id', 'user_id', 'skill_id', unique=True),
+        )
+
+        # Relationships
+        user = relationship("User", back_populates="skills")
+        skill = relationship("Skill", back_populates="users")
+
+    class ServiceRequest(Base):
+        """ServiceRequest model for storing service request information."""
+        __tablename__ = 'service_requests'
+
+        id: Mapped[int] = mapped_column(primary_key=True)
+        requester_id: Mapped[int] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'))
+        provider_id: Mapped[int] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'))
+        skill_id: Mapped[Optional[int]] = mapped_column(ForeignKey('skills.id'))
+        time: Mapped[datetime] = mapped_column(DateTime)
+        duration: Mapped[int]  # in minutes
+        credit_cost: Mapped[int]
+        status: Mapped[Optional[str]] = mapped_column(String(20), default='pending')
+        notes: Mapped[Optional[str]] = mapped_column(Text)
+        created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now())
+        updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
+
+        # Add check constraint for status
+        __table_args__ = (
+            CheckConstraint("status IN ('pending', 'accepted', 'rejected', 'completed')"),
+        )
+
+        # Relationships
+        requester = relationship("User", foreign_keys=[requester_id], back_populates="requests_as_requester")
+        provider = relationship("User", foreign_keys=[provider_id], back_populates="requests_as_provider")
+        skill = relationship("Skill", back_populates="service_requests")
+        reviews = relationship("Review", back_populates="service_request", cascade="all, delete-orphan")
+
+    class Review(Base):
+        """Review model for storing review information."""
+        __tablename__ = 'reviews'
+
+        id: Mapped[int] = mapped_column(primary_key=True)
+        service_request_id: Mapped[int] = mapped_column(ForeignKey('service_requests.id', ondelete='CASCADE'))
+        reviewer_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
+        reviewee_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
+        rating: Mapped[int]
+        comments: Mapped[Optional[str]] = mapped_column(Text)
+        created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now())
+
+        # Add check constraint for rating
+        __table_args__ = (
+            CheckConstraint('rating BETWEEN 1 AND 5'),
+        )
+
+        # Relationships
+        service_request = relationship("ServiceRequest", back_populates="reviews")
+        reviewer = relationship("User", foreign_keys=[reviewer_id], back_populates="reviews_given")
+        reviewee = relationship("User", foreign_keys=[reviewee_id], back_populates="reviews_received")
+
+    # Indexes for the list and lookup queries in lib/
+    Index('ix_user_skills_skill_id_user_id', UserSkill.skill_id, UserSkill.user_id)
+    Index('ix_service_requests_requester_id_time', ServiceRequest.requester_id, ServiceRequest.time.desc())
+    Index('ix_service_requests_provider_id_time', ServiceRequest.provider_id, ServiceRequest.time.desc())
+    Index('ix_reviews_reviewee_id_created_at', Review.reviewee_id, Review.created_at.desc(), Review.rating)
+    Index('ix_reviews_reviewer_id_created_at', Review.reviewer_id, Review.created_at.desc())
+    Index('ix_reviews_service_request_id', Review.service_request_id)
+
+@functools.lru_cache(maxsize=1)
+def get_engine():
+    """Create the SQLAlchemy engine on first use and return it."""
+    from sqlalchemy import create_engine
+    return create_engine(DATABASE_URL)
 
-# Create engine
-engine = create_engine(DATABASE_URL)
+def __getattr__(name):
+    """Build the models, or the engine for models.engine, the first time they are accessed."""
+    if name in _MODEL_NAMES:
+        _load()
+        return globals()[name]
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def create_tables():
     """Create all tables in the database."""
-    Base.metadata.create_all(engine)
+    _load()
+    Base.metadata.create_all(get_engine())
@@ -1,12 +1,46 @@
 """
 Service request commands for the skill-swap application.
 """
-from datetime import datetime
-from tabulate import tabulate
+import json
 from . import db
 from . import auth
 from . import utils
 
+# Format service times are bound in, matching what SQLite's datetime() stores
+_DB_TIME_FMT = "%Y-%m-%d %H:%M:%S"
+
+# Whether the provider offers the skill
+_PROVIDER_SKILL_QUERY = """
+    SELECT 1 FROM users u
+    JOIN user_skills us ON us.user_id = u.id
+    WHERE u.id = %s AND us.skill_id = %s AND u.deleted_at IS NULL
+    LIMIT 1
+"""
+
+# The request, with its reviews as a JSON array of
+# [reviewer, reviewee, rating, comments]
+_VIEW_REQUEST_QUERY = """
+    SELECT r.id, r.status, 
+           requester.id as requester_id, requester.username as requester_name,
+           provider.id as provider_id, provider.username as provider_name,
+           s.id as skill_id, s.name as skill_name, 
+           r.time, r.duration, r.credit_cost, r.notes,
+           r.created_at, r.updated_at,
+           (SELECT json_group_array(json_array(
+                       reviewer.username, reviewee.username, rv.rating, rv.comments))
+            FROM (SELECT * FROM reviews
+                  WHERE service_request_id = r.id
+                  ORDER BY created_at, id) rv
+            JOIN users reviewer ON rv.reviewer_id = reviewer.id
+            JOIN users reviewee ON rv.reviewee_id = reviewee.id) as reviews
+    FROM service_requests r
+    JOIN users requester ON r.requester_id = requester.id
+    JOIN users provider ON r.provider_id = provider.id
+    JOIN skills s ON r.skill_id = s.id
+    WHERE r.id = %(request_id)s
+      AND (r.requester_id = %(user_id)s OR r.provider_id = %(user_id)s)
+"""
+
 @auth.require_login
 def create_request(provider_id, skill_id, time_str, duration, credit_cost, notes=None):
     """
@@ -25,134 +59,139 @@ def create_request(provider_id, skill_id, time_str, duration, credit_cost, notes
     """
     current_user = auth.get_current_user()
     
-    # Validate provider
-    provider = db.execute_query(
-        "SELECT id FROM users WHERE id = %s AND deleted_at IS NULL",
-        (provider_id,),
-        fetch=True
-    )
-    
-    if not provider:
-        print(f"Provider with ID {provider_id} not found.")
-        return False
+    # Validate provider and skill together
+    provider_skill = db.execute_query(_PROVIDER_SKILL_QUERY, (provider_id, skill_id), fetch=True)
     
-    # Validate skill
-    skill = db.execute_query(
-        """
-        SELECT s.id FROM skills s
-        JOIN user_skills us ON s.id = us.skill_id
-        WHERE s.id = %s AND us.user_id = %s
-        """,
-        (skill_id, provider_id),
-        fetch=True
-    )
-    
-    if not skill:
-        print(f"Provider does not offer the skill with ID {skill_id}.")
+    if not provider_skill:
+        # Only look up which check failed when one did
+        provider = db.execute_query(
+            "SELECT 1 FROM users WHERE id = %s AND deleted_at IS NULL",
+            (provider_id,),
+            fetch=True
+        )
+        if not provider:
+            print(f"Provider with ID {provider_id} not found.")
+        else:
+            print(f"Provider does not offer the skill with ID {skill_id}.")
         return False
     
-    # Validate time
+    # Validate the time format; the INSERT checks that it is in the future
     try:
-        service_time = utils.parse_datetime(time_str)
-        if service_time < datetime.now():
-            print("Service time must be in the future.")
-            return False
+        service_time = utils.parse_datetime(time_str).strftime(_DB_TIME_FMT)
     except ValueError:
         print("Invalid time format. Use YYYY-MM-DDTHH:MM")
         return False
     
     # Validate duration and credit cost
-    if not utils.validate_integer(duration, min_val=15):
+    ok, _ = utils.validate_integer(duration, min_val=15)
+    if not ok:
         print("Duration must be at least 15 minutes.")
         return False
     
-    if not utils.validate_integer(credit_cost, min_val=1):
+    ok, _ = utils.validate_integer(credit_cost, min_val=1)
+    if not ok:
         print("Credit cost must be at least 1.")
         return False
     
-    # Create the request
+    # Create the request; no row comes back if the time is not in the future
     try:
-        db.execute_query(
+        created = db.execute_query(
             """
             INSERT INTO service_requests
             (requester_id, provider_id, skill_id, time, duration, credit_cost, notes)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            SELECT %(requester_id)s, %(provider_id)s, %(skill_id)s, datetime(%(time)s),
+                   %(duration)s, %(credit_cost)s, %(notes)s
+            WHERE datetime(%(time)s) > datetime('now', 'localtime')
+            RETURNING id
             """,
-            (
-                current_user.user_id, 
-                provider_id, 
-                skill_id, 
-                service_time, 
-                duration, 
-                credit_cost, 
-                notes
-            )
+            {
+                "requester_id": current_user.user_id,
+                "provider_id": provider_id,
+                "skill_id": skill_id,
+                "time": service_time,
+                "duration": duration,
+                "credit_cost": credit_cost,
+                "notes": notes,
+            },
+            fetch=True
         )
-        print("Service request created successfully!")
-        return True
     except Exception as e:
         print(f"Error creating service request: {e}")
         return False
-
-@auth.require_login
-def list_requests(user_id=None, status=None):
-    """
-    List service requests, optionally filtered.
     
-    Args:
-        user_id (int, optional): Filter by user ID
-        status (str, optional): Filter by status
-    """
-    current_user = auth.get_current_user()
+    if not created:
+        print("Service time must be in the future.")
+        return False
     
-    # Build the query
-    query = """
+    print("Service request created successfully!")
+    return True
+
+# Filters for list_requests, keyed by whether a status filter is given
+_LIST_REQUESTS_FROM = {
+    has_status: """
+        FROM service_requests r
+        JOIN users requester ON r.requester_id = requester.id
+        JOIN users provider ON r.provider_id = provider.id
+        JOIN skills s ON r.skill_id = s.id
+        WHERE (r.requester_id = %(user_id)s OR r.provider_id = %(user_id)s)
+    """ + (" AND r.status = %(status)s" if has_status else "")
+    for has_status in (False, True)
+}
+_COUNT_REQUESTS_QUERIES = {
+    has_status: "SELECT COUNT(*)" + from_clause
+    for has_status, from_clause in _LIST_REQUESTS_FROM.items()
+}
+_LIST_REQUESTS_QUERIES = {
+    has_status: """
         SELECT r.id, r.status, 
                requester.username as requester, 
                provider.username as provider,
                s.name as skill_name, r.time, 
                r.duration, r.credit_cost
-        FROM service_requests r
-        JOIN users requester ON r.requester_id = requester.id
-        JOIN users provider ON r.provider_id = provider.id
-        JOIN skills s ON r.skill_id = s.id
-        WHERE 1=1
+    """ + from_clause + " ORDER BY r.time DESC LIMIT %(limit)s OFFSET %(offset)s"
+    for has_status, from_clause in _LIST_REQUESTS_FROM.items()
+}
+
+@auth.require_login
+def list_requests(user_id=None, status=None, page=1, page_size=utils.PAGE_SIZE, fmt="simple"):
     """
-    params = []
+    List service requests, optionally filtered, one page at a time.
     
-    # Apply filters
-    if user_id:
-        query += " AND (r.requester_id = %s OR r.provider_id = %s)"
-        params.extend([user_id, user_id])
-    else:
-        # If no user_id specified, only show requests for the current user
-        query += " AND (r.requester_id = %s OR r.provider_id = %s)"
-        params.extend([current_user.user_id, current_user.user_id])
-    
-    if status:
-        query += " AND r.status = %s"
-        params.append(status)
+    Args:
+        user_id (int, optional): Filter by user ID
+        status (str, optional): Filter by status
+        page (int): The page to show, starting at 1
+        page_size (int): The number of requests per page
+        fmt (str): The output format, one of utils.TABLE_FORMATS
+    """
+    current_user = auth.get_current_user()
     
-    query += " ORDER BY r.time DESC"
+    # If no user_id specified, only show requests for the current user
+    params = {"user_id": user_id or current_user.user_id, "status": status}
+    has_status = bool(status)
     
-    # Execute query
-    requests = db.execute_query(query, params, fetch=True)
+    total = db.execute_query(_COUNT_REQUESTS_QUERIES[has_status], params, fetch=True)[0][0]
+    offset = (page - 1) * page_size
     
-    if not requests:
+    if offset >= total:
         print("No service requests found.")
         return
     
+    # Execute query
+    requests = db.iter_query(
+        _LIST_REQUESTS_QUERIES[has_status],
+        {**params, "limit": page_size, "offset": offset}
+    )
+    
     # Format requests for display
     headers = ["ID", "Status", "Requester", "Provider", "Skill", "Time", "Duration", "Credits"]
-    rows = []
-    
-    for r in requests:
-        # Format the datetime
-        time_str = utils.format_datetime(r[5])
-        rows.append([r[0], r[1], r[2], r[3], r[4], time_str, f"{r[6]} min", r[7]])
+    rows = (
+        [r[0], r[1], r[2], r[3], r[4], utils.format_datetime(r[5]), f"{r[6]} min", r[7]]
+        for r in requests
+    )
     
-    print("\n=== Service Requests ===")
-    print(tabulate(rows, headers=headers, tablefmt="simple"))
+    utils.print_table("Service Requests", headers, rows, fmt)
+    utils.print_page_footer(page, page_size, total, fmt)
 
 @auth.require_login
 def view_request(request_id):
@@ -164,22 +203,10 @@ def view_request(request_id):
     """
     current_user = auth.get_current_user()
     
-    # Get request details
+    # Get request details and reviews
     request = db.execute_query(
-        """
-        SELECT r.id, r.status, 
-               requester.id as requester_id, requester.username as requester_name,
-               provider.id as provider_id, provider.username as provider_name,
-               s.id as skill_id, s.name as skill_name, 
-               r.time, r.duration, r.credit_cost, r.notes,
-               r.created_at, r.updated_at
-        FROM service_requests r
-        JOIN users requester ON r.requester_id = requester.id
-        JOIN users provider ON r.provider_id = provider.id
-        JOIN skills s ON r.skill_id = s.id
-        WHERE r.id = %s AND (r.requester_id = %s OR r.provider_id = %s)
-        """,
-        (request_id, current_user.user_id, current_user.user_id),
+        _VIEW_REQUEST_QUERY,
+        {"request_id": request_id, "user_id": current_user.user_id},
         fetch=True
     )
     
@@ -201,29 +228,29 @@ def view_request(request_id):
     print(f"Created: {utils.format_datetime(r[12])}")
     print(f"Last Updated: {utils.format_datetime(r[13])}")
     
-    # Check if there are reviews for this request
-    reviews = db.execute_query(
-        """
-        SELECT reviewer.username, reviewee.username, r.rating, r.comments
-        FROM reviews r
-        JOIN users reviewer ON r.reviewer_id = reviewer.id
-        JOIN users reviewee ON r.reviewee_id = reviewee.id
-        WHERE r.service_request_id = %s
-        """,
-        (request_id,),
-        fetch=True
-    )
-    
+    reviews = json.loads(r[14])
     if reviews:
         print("\nReviews:")
         for review in reviews:
             print(f"- {review[0]} rated {review[1]} {review[2]}/5: {review[3]}")
 
+# Allowed status changes: new status -> (required current status, column
+# holding the ID of the user allowed to make the change)
+_STATUS_TRANSITIONS = {
+    'cancelled': ('pending', 'requester_id'),    # Requester can cancel
+    'accepted': ('pending', 'provider_id'),      # Provider can accept/reject
+    'rejected': ('pending', 'provider_id'),
+    'completed': ('accepted', 'provider_id'),    # Provider can mark as completed
+}
+
 @auth.require_login
 def update_request(request_id, status=None, notes=None, time_str=None):
     """
     Update a service request.
     
+    Permission and status-transition checks are part of the UPDATE's WHERE
+    clause, so the request is checked and changed in one statement.
+    
     Args:
         request_id (int): The ID of the request to update
         status (str, optional): New status
@@ -235,95 +262,104 @@ def update_request(request_id, status=None, notes=None, time_str=None):
     """
     current_user = auth.get_current_user()
     
-    # Get the request
-    request = db.execute_query(
-        """
-        SELECT requester_id, provider_id, status
-        FROM service_requests
-        WHERE id = %s
-        """,
-        (request_id,),
-        fetch=True
-    )
-    
-    if not request:
-        print(f"Service request with ID {request_id} not found.")
-        return False
-    
-    requester_id, provider_id, current_status = request[0]
-    
-    # Check permissions
-    is_requester = requester_id == current_user.user_id
-    is_provider = provider_id == current_user.user_id
-    
-    if not (is_requester or is_provider):
-        print("You don't have permission to update this request.")
-        return False
-    
     # Build update query
-    query = "UPDATE service_requests SET updated_at = NOW()"
-    params = []
+    assignments = ["updated_at = CURRENT_TIMESTAMP"]
+    conditions = ["id = %(request_id)s", "(requester_id = %(user_id)s OR provider_id = %(user_id)s)"]
+    params = {"request_id": request_id, "user_id": current_user.user_id}
     
     if status:
-        # Validate status transition
-        valid_status = False
-        
-        if current_status == 'pending':
-            # Requester can cancel, provider can accept/reject
-            if is_requester and status == 'cancelled':
-                valid_status = True
-            elif is_provider and status in ('accepted', 'rejected'):
-                valid_status = True
-        elif current_status == 'accepted':
-            # Provider can mark as completed
-            if is_provider and status == 'completed':
-                valid_status = True
+        assignments.append("status = %(status)s")
         
-        if not valid_status:
-            print(f"Invalid status transition from '{current_status}' to '{status}'.")
-            return False
-        
-        query += ", status = %s"
-        params.append(status)
+        from_status, role_column = _STATUS_TRANSITIONS.get(status, (None, 'id'))
+        conditions.append(f"status = %(from_status)s AND {role_column} = %(user_id)s")
+        params.update(status=status, from_status=from_status)
     
     if notes:
-        query += ", notes = %s"
-        params.append(notes)
+        assignments.append("notes = %(notes)s")
+        params["notes"] = notes
     
+    service_time = None
     if time_str:
-        if not is_requester:
-            print("Only the requester can change the time.")
-            return False
-        
         try:
-            service_time = utils.parse_datetime(time_str)
-            if service_time < datetime.now():
-                print("Service time must be in the future.")
-                return False
-            
-            query += ", time = %s"
-            params.append(service_time)
+            service_time = utils.parse_datetime(time_str).strftime(_DB_TIME_FMT)
         except ValueError:
             print("Invalid time format. Use YYYY-MM-DDTHH:MM")
             return False
+        
+        assignments.append("time = datetime(%(time)s)")
+        params["time"] = service_time
+        
+        # Only the requester can change the time, and only to a future time
+        conditions.append("requester_id = %(user_id)s AND datetime(%(time)s) > datetime('now', 'localtime')")
     
     # If nothing to update
-    if not params:
+    if len(assignments) == 1:
         print("No updates specified.")
         return False
     
-    # Add the WHERE clause
-    query += " WHERE id = %s"
-    params.append(request_id)
+    query = f"UPDATE service_requests SET {', '.join(assignments)} WHERE {' AND '.join(conditions)}"
     
     # Execute the update
     try:
-        db.execute_query(query, params)
-        print("Service request updated successfully!")
-        return True
+        updated = db.execute_query(query, params)
     except Exception as e:
         print(f"Error updating service request: {e}")
         return False
+    
+    if not updated:
+        _explain_update_failure(request_id, current_user.user_id, status, service_time)
+        return False
+    
+    print("Service request updated successfully!")
+    return True
+
+def _explain_update_failure(request_id, user_id, status, service_time):
+    """
+    Print why update_request() did not change a service request.
+    
+    Args:
+        request_id (int): The ID of the request
+        user_id (int): The ID of the user attempting the update
+        status (str): The requested new status, if any
+        service_time (str): The requested new time in _DB_TIME_FMT, if any
+    """
+    request = db.execute_query(
+        """
+        SELECT requester_id, provider_id, status,
+               datetime(%s) > datetime('now', 'localtime') as time_ok
+        FROM service_requests
+        WHERE id = %s
+        """,
+        (service_time, request_id),
+        fetch=True
+    )
+    
+    if not request:
+        print(f"Service request with ID {request_id} not found.")
+        return
+    
+    requester_id, provider_id, current_status, time_ok = request[0]
+    roles = {'requester_id': requester_id, 'provider_id': provider_id}
+    
+    if user_id not in (requester_id, provider_id):
+        print("You don't have permission to update this request.")
+        return
+    
+    if status:
+        from_status, role_column = _STATUS_TRANSITIONS.get(status, (None, None))
+        if current_status != from_status or roles.get(role_column) != user_id:
+            print(f"Invalid status transition from '{current_status}' to '{status}'.")
+            return
+    
+    if service_time and requester_id != user_id:
+        print("Only the requester can change the time.")
+        return
+    
+    if service_time and not time_ok:
+        print("Service time must be in the future.")
+        return
+    
+    print("Service request changed while updating it; please try again.")
 
 @auth.require_login
 def delete_request(request_id):
@@ -338,29 +374,27 @@ def delete_request(request_id):
     """
     current_user = auth.get_current_user()
     
-    # Check if request exists and user is the requester
-    request = db.execute_query(
-        "SELECT requester_id FROM service_requests WHERE id = %s",
-        (request_id,),
-        fetch=True
-    )
-    
-    if not request:
-        print(f"Service request with ID {request_id} not found.")
-        return False
-    
-    if request[0][0] != current_user.user_id:
-        print("You can only delete requests that you created.")
-        return False
-    
-    # Delete the request
+    # Delete the request if the user is the requester
     try:
-        db.execute_query(
-            "DELETE FROM service_requests WHERE id = %s",
-            (request_id,)
+        deleted = db.execute_query(
+            "DELETE FROM service_requests WHERE id = %s AND requester_id = %s",
+            (request_id, current_user.user_id)
         )
-        print("Service request deleted successfully!")
-        return True
     except Exception as e:
         print(f"Error deleting service request: {e}")
         return False
+    
+    if not deleted:
+        # Work out whether the request is missing or belongs to someone else
+        if db.execute_query(
+            "SELECT 1 FROM service_requests WHERE id = %s",
+            (request_id,),
+            fetch=True
+        ):
+            print("You can only delete requests that you created.")
+        else:
+            print(f"Service request with ID {request_id} not found.")
+        return False
+    
+    print("Service request deleted successfully!")
+    return True
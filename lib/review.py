@@ -1,13 +1,29 @@
 """
 Review commands for the skill-swap application.
 """
-from tabulate import tabulate
 from . import db
 from . import auth
 from . import utils
 
+def review_stats(user_id):
+    """
+    Get the average rating and number of reviews a user has received.
+    
+    Args:
+        user_id (int): The ID of the reviewee
+        
+    Returns:
+        tuple: The average rating (None if there are no reviews) and the review count
+    """
+    return tuple(db.execute_query(
+        "SELECT AVG(rating), COUNT(*) FROM reviews WHERE reviewee_id = %s",
+        (user_id,),
+        fetch=True
+    )[0])
+
 @auth.require_login
-def add_review(request_id, rating, comments):
+@auth.require_request_participant()
+def add_review(request_id, rating, comments, request_row=None):
     """
     Add a review for a completed service request.
     
@@ -15,6 +31,8 @@ def add_review(request_id, rating, comments):
         request_id (int): The ID of the service request
         rating (int): Rating from 1 to 5
         comments (str): Review comments
+        request_row (tuple): The request's requester ID, provider ID and
+            status, passed by require_request_participant
         
     Returns:
         bool: True if successful, False otherwise
@@ -22,33 +40,13 @@ def add_review(request_id, rating, comments):
     current_user = auth.get_current_user()
     
     # Validate rating
-    if not utils.validate_integer(rating, min_val=1, max_val=5):
+    ok, _ = utils.validate_integer(rating, min_val=1, max_val=5)
+    if not ok:
         print("Rating must be between 1 and 5.")
         return False
     
-    # Get the service request
-    request = db.execute_query(
-        """
-        SELECT requester_id, provider_id, status
-        FROM service_requests
-        WHERE id = %s
-        """,
-        (request_id,),
-        fetch=True
-    )
+    requester_id, provider_id, status = request_row
     
-    if not request:
-        print(f"Service request with ID {request_id} not found.")
-        return False
-    
-    requester_id, provider_id, status = request[0]
-    
-    # Check if user is part of the request
-    if current_user.user_id != requester_id and current_user.user_id != provider_id:
-        print("You can only review requests you participated in.")
-        return False
-    
-    # Check if request is completed
     if status != 'completed':
         print("You can only review completed requests.")
         return False
@@ -60,8 +58,9 @@ def add_review(request_id, rating, comments):
     # Check if review already exists
     existing_review = db.execute_query(
         """
-        SELECT id FROM reviews
+        SELECT 1 FROM reviews
         WHERE service_request_id = %s AND reviewer_id = %s
+        LIMIT 1
         """,
         (request_id, reviewer_id),
         fetch=True
@@ -88,140 +87,110 @@ def add_review(request_id, rating, comments):
         return False
 
 @auth.require_login
-def list_reviews_by_reviewer(reviewer_id):
+def list_reviews_by_reviewer(reviewer_id, fmt="simple"):
     """
     List reviews by a specific reviewer.
     
     Args:
         reviewer_id (int): The ID of the reviewer
+        fmt (str): The output format, one of utils.TABLE_FORMATS
     """
     # Validate reviewer
     if not db.execute_query(
-        "SELECT id FROM users WHERE id = %s AND deleted_at IS NULL",
+        "SELECT 1 FROM users WHERE id = %s AND deleted_at IS NULL",
         (reviewer_id,),
         fetch=True
     ):
         print(f"User with ID {reviewer_id} not found.")
         return
     
-    # Get reviews
-    reviews = db.execute_query(
+    # Get reviews, with comments cut to one past the 50 characters shown
+    reviews = utils.nonempty(db.iter_query(
         """
-        SELECT r.id, u.username as reviewee, r.rating, r.comments, 
-               r.created_at, sr.id as request_id
+        SELECT r.id, u.username as reviewee, r.rating, SUBSTR(r.comments, 1, 51), 
+               r.created_at, r.service_request_id
         FROM reviews r
         JOIN users u ON r.reviewee_id = u.id
-        JOIN service_requests sr ON r.service_request_id = sr.id
         WHERE r.reviewer_id = %s
         ORDER BY r.created_at DESC
         """,
-        (reviewer_id,),
-        fetch=True
-    )
+        (reviewer_id,)
+    ))
     
-    if not reviews:
+    if reviews is None:
         print("No reviews found.")
         return
     
     # Format reviews for display
     headers = ["ID", "Reviewee", "Rating", "Comments", "Date", "Request ID"]
-    rows = [
-        [
-            r[0], r[1], f"{r[2]}/5", 
-            r[3][:50] + ('...' if len(r[3]) > 50 else ''), 
-            utils.format_datetime(r[4]), r[5]
-        ] 
+    rows = (
+        [r[0], r[1], f"{r[2]}/5", r[3], utils.format_datetime(r[4]), r[5]]
         for r in reviews
-    ]
+    )
     
-    print("\n=== Reviews Given ===")
-    print(tabulate(rows, headers=headers, tablefmt="simple"))
+    utils.print_table("Reviews Given", headers, rows, fmt, max_widths={3: 50})
 
 @auth.require_login
-def list_reviews_by_reviewee(reviewee_id):
+def list_reviews_by_reviewee(reviewee_id, fmt="simple"):
     """
     List reviews for a specific reviewee.
     
     Args:
         reviewee_id (int): The ID of the reviewee
+        fmt (str): The output format, one of utils.TABLE_FORMATS
     """
     # Validate reviewee
     if not db.execute_query(
-        "SELECT id FROM users WHERE id = %s AND deleted_at IS NULL",
+        "SELECT 1 FROM users WHERE id = %s AND deleted_at IS NULL",
         (reviewee_id,),
         fetch=True
     ):
         print(f"User with ID {reviewee_id} not found.")
         return
     
-    # Get reviews
-    reviews = db.execute_query(
+    avg_rating, review_count = review_stats(reviewee_id)
+    
+    if not review_count:
+        print("No reviews found.")
+        return
+    
+    # Get reviews, with comments cut to one past the 50 characters shown
+    reviews = utils.nonempty(db.iter_query(
         """
-        SELECT r.id, u.username as reviewer, r.rating, r.comments, 
-               r.created_at, sr.id as request_id
+        SELECT r.id, u.username as reviewer, r.rating, SUBSTR(r.comments, 1, 51), 
+               r.created_at, r.service_request_id
         FROM reviews r
         JOIN users u ON r.reviewer_id = u.id
-        JOIN service_requests sr ON r.service_request_id = sr.id
         WHERE r.reviewee_id = %s
         ORDER BY r.created_at DESC
         """,
-        (reviewee_id,),
-        fetch=True
-    )
+        (reviewee_id,)
+    ))
     
-    if not reviews:
+    if reviews is None:
         print("No reviews found.")
         return
     
-    # Calculate average rating
-    total_rating = sum(r[2] for r in reviews)
-    avg_rating = total_rating / len(reviews)
-    
     # Format reviews for display
     headers = ["ID", "Reviewer", "Rating", "Comments", "Date", "Request ID"]
-    rows = [
-        [
-            r[0], r[1], f"{r[2]}/5", 
-            r[3][:50] + ('...' if len(r[3]) > 50 else ''), 
-            utils.format_datetime(r[4]), r[5]
-        ] 
+    rows = (
+        [r[0], r[1], f"{r[2]}/5", r[3], utils.format_datetime(r[4]), r[5]]
         for r in reviews
-    ]
+    )
     
-    print(f"\n=== Reviews Received (Average: {avg_rating:.1f}/5) ===")
-    print(tabulate(rows, headers=headers, tablefmt="simple"))
+    utils.print_table(f"Reviews Received (Average: {avg_rating:.1f}/5)", headers, rows, fmt,
+                      max_widths={3: 50})
 
 @auth.require_login
-def view_reviews_for_request(request_id):
+@auth.require_request_participant()
+def view_reviews_for_request(request_id, request_row=None):
     """
     View all reviews for a specific service request.
     
     Args:
         request_id (int): The ID of the service request
+        request_row (tuple): Passed by require_request_participant
     """
-    current_user = auth.get_current_user()
-    
-    # Check if request exists and user is part of it
-    request = db.execute_query(
-        """
-        SELECT requester_id, provider_id
-        FROM service_requests
-        WHERE id = %s
-        """,
-        (request_id,),
-        fetch=True
-    )
-    
-    if not request:
-        print(f"Service request with ID {request_id} not found.")
-        return
-    
-    requester_id, provider_id = request[0]
-    
-    if current_user.user_id != requester_id and current_user.user_id != provider_id:
-        print("You can only view reviews for requests you participated in.")
-        return
-    
     # Get reviews
     reviews = db.execute_query(
         """
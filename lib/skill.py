@@ -1,7 +1,6 @@
 """
 Skill management commands for the skill-swap application.
 """
-from tabulate import tabulate
 from . import db
 from . import auth
 from . import utils
@@ -16,57 +15,42 @@ def add_skill(skill_name):
     """
     current_user = auth.get_current_user()
     
-    # Check if skill exists
-    skill = db.execute_query(
-        "SELECT id FROM skills WHERE name = %s",
-        (skill_name,),
-        fetch=True
-    )
-    
-    skill_id = None
-    if skill:
-        skill_id = skill[0][0]
-    else:
-        # Create the skill if it doesn't exist
-        try:
-            db.execute_query(
-                "INSERT INTO skills (name) VALUES (%s) RETURNING id",
-                (skill_name,),
-                fetch=True
-            )
-            
-            skill = db.execute_query(
-                "SELECT id FROM skills WHERE name = %s",
-                (skill_name,),
-                fetch=True
-            )
-            skill_id = skill[0][0]
-        except Exception as e:
-            print(f"Error creating skill: {e}")
-            return False
-    
-    # Check if user already has this skill
-    user_skill = db.execute_query(
-        "SELECT id FROM user_skills WHERE user_id = %s AND skill_id = %s",
-        (current_user.user_id, skill_id),
-        fetch=True
-    )
-    
-    if user_skill:
-        print(f"You already have the skill '{skill_name}'.")
+    # Create the skill if it doesn't exist, getting its ID either way
+    try:
+        skill_id = db.execute_query(
+            """
+            INSERT INTO skills (name) VALUES (%s)
+            ON CONFLICT (name) DO UPDATE SET name = excluded.name
+            RETURNING id
+            """,
+            (skill_name,),
+            fetch=True
+        )[0][0]
+    except Exception as e:
+        print(f"Error creating skill: {e}")
         return False
     
-    # Add skill to user
+    # Add skill to user; no row comes back if the user already has it
     try:
-        db.execute_query(
-            "INSERT INTO user_skills (user_id, skill_id) VALUES (%s, %s)",
-            (current_user.user_id, skill_id)
+        added = db.execute_query(
+            """
+            INSERT INTO user_skills (user_id, skill_id) VALUES (%s, %s)
+            ON CONFLICT (user_id, skill_id) DO NOTHING
+            RETURNING id
+            """,
+            (current_user.user_id, skill_id),
+            fetch=True
         )
-        print(f"Skill '{skill_name}' added successfully!")
-        return True
     except Exception as e:
         print(f"Error adding skill: {e}")
         return False
+    
+    if not added:
+        print(f"You already have the skill '{skill_name}'.")
+        return False
+    
+    print(f"Skill '{skill_name}' added successfully!")
+    return True
 
 @auth.require_login
 def remove_skill(skill_id):
@@ -106,37 +90,49 @@ def remove_skill(skill_id):
         return False
 
 @auth.require_login
-def list_skills():
-    """List all available skills."""
-    skills = db.execute_query(
+def list_skills(page=1, page_size=utils.PAGE_SIZE, fmt="simple"):
+    """
+    List all available skills, one page at a time.
+    
+    Args:
+        page (int): The page to show, starting at 1
+        page_size (int): The number of skills per page
+        fmt (str): The output format, one of utils.TABLE_FORMATS
+    """
+    total = db.execute_query("SELECT COUNT(*) FROM skills", fetch=True)[0][0]
+    offset = (page - 1) * page_size
+    
+    if offset >= total:
+        print("No skills found.")
+        return
+    
+    skills = db.iter_query(
         """
         SELECT s.id, s.name, COUNT(us.user_id) as user_count
         FROM skills s
         LEFT JOIN user_skills us ON s.id = us.skill_id
         GROUP BY s.id
         ORDER BY s.name
+        LIMIT %s OFFSET %s
         """,
-        fetch=True
+        (page_size, offset)
     )
     
-    if not skills:
-        print("No skills found.")
-        return
-    
     # Format skills for display
     headers = ["ID", "Skill Name", "Users with Skill"]
-    rows = [[s[0], s[1], s[2]] for s in skills]
+    rows = ([s[0], s[1], s[2]] for s in skills)
     
-    print("\n=== Skills ===")
-    print(tabulate(rows, headers=headers, tablefmt="simple"))
+    utils.print_table("Skills", headers, rows, fmt)
+    utils.print_page_footer(page, page_size, total, fmt)
     
 @auth.require_login
-def browse_users_by_skill(skill_id):
+def browse_users_by_skill(skill_id, fmt="simple"):
     """
     List users who have a specific skill.
     
     Args:
         skill_id (int): The ID of the skill to browse
+        fmt (str): The output format, one of utils.TABLE_FORMATS
     """
     # Check if skill exists
     skill = db.execute_query(
@@ -149,29 +145,29 @@ def browse_users_by_skill(skill_id):
         print(f"Skill with ID {skill_id} not found.")
         return
     
-    # Get users with this skill
-    users = db.execute_query(
+    skill_name = skill[0][0]
+    
+    # Get users with this skill, with bios cut to one past the 50 characters shown
+    users = utils.nonempty(db.iter_query(
         """
-        SELECT u.id, u.username, u.full_name, u.bio
+        SELECT u.id, u.username, u.full_name, SUBSTR(u.bio, 1, 51)
         FROM users u
         JOIN user_skills us ON u.id = us.user_id
         WHERE us.skill_id = %s AND u.deleted_at IS NULL
         ORDER BY u.username
         """,
-        (skill_id,),
-        fetch=True
-    )
+        (skill_id,)
+    ))
     
-    if not users:
-        print(f"No users found with skill '{skill[0][0]}'.")
+    if users is None:
+        print(f"No users found with skill '{skill_name}'.")
         return
     
     # Format users for display
     headers = ["ID", "Username", "Full Name", "Bio"]
-    rows = [[u[0], u[1], u[2] or 'N/A', (u[3] or 'N/A')[:50]] for u in users]
+    rows = ([u[0], u[1], u[2] or 'N/A', u[3] or 'N/A'] for u in users)
     
-    print(f"\n=== Users with Skill: {skill[0][0]} ===")
-    print(tabulate(rows, headers=headers, tablefmt="simple"))
+    utils.print_table(f"Users with Skill: {skill_name}", headers, rows, fmt, max_widths={3: 50})
 
 @auth.require_login
 def list_user_skills():
@@ -196,7 +192,6 @@ def list_user_skills():
     
     # Format skills for display
     headers = ["ID", "Skill Name"]
-    rows = [[s[0], s[1]] for s in skills]
+    rows = ([s[0], s[1]] for s in skills)
     
-    print(f"\n=== Your Skills ===")
-    print(tabulate(rows, headers=headers, tablefmt="simple"))
+    utils.print_table("Your Skills", headers, rows)
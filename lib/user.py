@@ -1,11 +1,46 @@
 """
 User management commands for the skill-swap application.
 """
-from tabulate import tabulate
 from . import db
 from . import auth
 from . import utils
 
+def user_profile(user_id):
+    """
+    Get a user's details and skills.
+    
+    Args:
+        user_id (int): The ID of the user
+        
+    Returns:
+        tuple: The (id, username, email, full_name, bio) row and a list of
+        (skill id, skill name) rows, or None if the user does not exist
+    """
+    user = db.execute_query(
+        """
+        SELECT u.id, u.username, u.email, u.full_name, u.bio
+        FROM users u
+        WHERE u.id = %s AND u.deleted_at IS NULL
+        """,
+        (user_id,),
+        fetch=True
+    )
+    if not user:
+        return None
+    
+    skills = db.execute_query(
+        """
+        SELECT s.id, s.name
+        FROM skills s
+        JOIN user_skills us ON s.id = us.skill_id
+        WHERE us.user_id = %s
+        ORDER BY s.name
+        """,
+        (user_id,),
+        fetch=True
+    )
+    return user[0], skills
+
 def register_user():
     """Register a new user."""
     print("\n=== User Registration ===")
@@ -30,28 +65,44 @@ def login_user():
     return auth.login(username, password)
 
 @auth.require_login
-def list_users():
-    """List all users."""
-    users = db.execute_query(
+def list_users(page=1, page_size=utils.PAGE_SIZE, fmt="simple"):
+    """
+    List all users, one page at a time.
+    
+    Args:
+        page (int): The page to show, starting at 1
+        page_size (int): The number of users per page
+        fmt (str): The output format, one of utils.TABLE_FORMATS
+    """
+    total = db.execute_query(
+        "SELECT COUNT(*) FROM users WHERE deleted_at IS NULL",
+        fetch=True
+    )[0][0]
+    offset = (page - 1) * page_size
+    
+    if offset >= total:
+        print("No users found.")
+        return
+    
+    # Bios are cut to 50 characters for display; fetch one more so the
+    # table knows to add '...'
+    users = db.iter_query(
         """
-        SELECT id, username, email, full_name, bio
+        SELECT id, username, email, full_name, SUBSTR(bio, 1, 51)
         FROM users
         WHERE deleted_at IS NULL
         ORDER BY id
+        LIMIT %s OFFSET %s
         """,
-        fetch=True
+        (page_size, offset)
     )
     
-    if not users:
-        print("No users found.")
-        return
-    
     # Format users for display
     headers = ["ID", "Username", "Email", "Full Name", "Bio"]
-    rows = [[u[0], u[1], u[2], u[3] or '', (u[4] or '')[:50]] for u in users]
+    rows = ([u[0], u[1], u[2], u[3] or '', u[4] or ''] for u in users)
     
-    print("\n=== Users ===")
-    print(tabulate(rows, headers=headers, tablefmt="simple"))
+    utils.print_table("Users", headers, rows, fmt, max_widths={4: 50})
+    utils.print_page_footer(page, page_size, total, fmt)
 
 @auth.require_login
 def view_user(user_id):
@@ -61,35 +112,13 @@ def view_user(user_id):
     Args:
         user_id (int): The ID of the user to view
     """
-    # Get user details
-    user = db.execute_query(
-        """
-        SELECT u.id, u.username, u.email, u.full_name, u.bio
-        FROM users u
-        WHERE u.id = %s AND u.deleted_at IS NULL
-        """,
-        (user_id,),
-        fetch=True
-    )
+    profile = user_profile(user_id)
     
-    if not user:
+    if profile is None:
         print(f"User with ID {user_id} not found.")
         return
     
-    # Get user skills
-    skills = db.execute_query(
-        """
-        SELECT s.id, s.name
-        FROM skills s
-        JOIN user_skills us ON s.id = us.skill_id
-        WHERE us.user_id = %s
-        ORDER BY s.name
-        """,
-        (user_id,),
-        fetch=True
-    )
-    
-    user = user[0]
+    user, skills = profile
     print(f"\n=== User: {user[1]} (ID: {user[0]}) ===")
     print(f"Email: {user[2]}")
     print(f"Full Name: {user[3] or 'N/A'}")
@@ -123,19 +152,8 @@ def update_user():
     full_name = utils.get_input(f"Full Name [{user[2] or ''}]: ") or user[2]
     bio = utils.get_input(f"Bio [{user[3] or ''}]: ") or user[3]
     
-    # Check if username or email is taken by another user
-    if username != user[0] or email != user[1]:
-        check = db.execute_query(
-            "SELECT id FROM users WHERE (username = %s OR email = %s) AND id != %s",
-            (username, email, current_user.user_id),
-            fetch=True
-        )
-        
-        if check:
-            print("Username or email already in use by another user.")
-            return False
-    
-    # Update user
+    # Update user; the unique constraints reject a username or email
+    # already taken by another user
     try:
         db.execute_query(
             """
@@ -155,6 +173,9 @@ def update_user():
             
         print("Profile updated successfully!")
         return True
+    except db.IntegrityError:
+        print("Username or email already in use by another user.")
+        return False
     except Exception as e:
         print(f"Error updating profile: {e}")
         return False
@@ -176,7 +197,7 @@ def delete_user():
     # Soft delete the user
     try:
         db.execute_query(
-            "UPDATE users SET deleted_at = NOW() WHERE id = %s",
+            "UPDATE users SET deleted_at = CURRENT_TIMESTAMP WHERE id = %s",
             (current_user.user_id,)
         )
         
@@ -1,10 +1,37 @@
 """
 Utility functions for the skill-swap application.
 """
-import re
-import getpass
+import os
+import sys
+import string
+import functools
+import itertools
 from datetime import datetime
 
+# Characters allowed before the @ of an email address, and in its domain
+# name before the top-level domain, as bytes for _only_chars
+_EMAIL_LOCAL_CHARS = (string.ascii_letters + string.digits + '._%+-').encode('ascii')
+_EMAIL_DOMAIN_CHARS = (string.ascii_letters + string.digits + '.-').encode('ascii')
+
+# Characters allowed in a username, as bytes for _only_chars
+_USERNAME_CHARS = (string.ascii_letters + string.digits + '_-').encode('ascii')
+
+# Input format of service times, and how datetimes are displayed
+_DT_FMT = "%Y-%m-%dT%H:%M"
+_DISPLAY_FMT = "%Y-%m-%d %H:%M"
+
+# Bound once rather than looked up on the class for every parse
+_STRPTIME = datetime.strptime
+
+# Default number of rows shown per page by the list commands
+PAGE_SIZE = 50
+
+# Output formats of the list commands
+TABLE_FORMATS = ("simple", "tsv")
+
+# Tables with more rows than this are streamed by _simple_lines, not tabulate
+_TABULATE_MAX_ROWS = 500
+
 def get_input(prompt, required=False, validator=None):
     """
     Get user input with validation.
@@ -12,7 +39,8 @@ def get_input(prompt, required=False, validator=None):
     Args:
         prompt (str): The prompt to display to the user
         required (bool): Whether the input is required
-        validator (callable, optional): A function to validate the input
+        validator (callable, optional): A function to validate the input,
+            returning (ok, error message) like validate_email
         
     Returns:
         str: The validated input
@@ -27,8 +55,11 @@ def get_input(prompt, required=False, validator=None):
             print("This field is required.")
             continue
             
-        if validator and not validator(value):
-            continue
+        if validator:
+            ok, message = validator(value)
+            if not ok:
+                print(message)
+                continue
             
         return value
 
@@ -43,6 +74,9 @@ def get_password(prompt="Password: ", confirm=False):
     Returns:
         str: The password
     """
+    # Only login and registration prompt for passwords
+    import getpass
+    
     while True:
         password = getpass.getpass(prompt)
         
@@ -62,6 +96,57 @@ def get_password(prompt="Password: ", confirm=False):
                 
         return password
 
+def hash_password(password):
+    """
+    Hash a password for storage.
+
+    Args:
+        password (str): The plaintext password
+
+    Returns:
+        str: The salted bcrypt hash
+    """
+    # Only registration hashes passwords
+    import bcrypt
+
+    # Cost factor, read here rather than at import so .env can set it; each
+    # extra round doubles the hashing (and login) time. Existing hashes keep
+    # the cost they were created with.
+    rounds = int(os.environ.get("SKILLSWAP_BCRYPT_ROUNDS", "10"))
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+def check_password(password, password_hash):
+    """
+    Check a password against a stored hash.
+
+    Args:
+        password (str): The plaintext password
+        password_hash (str): The stored bcrypt hash
+
+    Returns:
+        bool: True if the password matches, False otherwise
+    """
+    import bcrypt
+
+    # checkpw compares the digests in constant time
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+def _only_chars(text, allowed):
+    """
+    Check that text consists only of the given ASCII characters.
+    
+    bytes.translate deletes the allowed bytes in one C-level pass over a
+    256-entry table; anything left over is a disallowed character.
+    
+    Args:
+        text (str): The text to check
+        allowed (bytes): The allowed characters
+        
+    Returns:
+        bool: True if every character of text is in allowed
+    """
+    return text.isascii() and not text.encode('ascii').translate(None, allowed)
+
 def validate_email(email):
     """
     Validate an email address.
@@ -70,13 +155,35 @@ def validate_email(email):
         email (str): The email to validate
         
     Returns:
-        bool: True if valid, False otherwise
+        tuple: (True, None) if valid, otherwise (False, the error message)
     """
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    if not re.match(pattern, email):
-        print("Invalid email address.")
-        return False
-    return True
+    # Same rules as ^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$, checked
+    # with string operations instead of the regex engine
+    local, _, domain = email.rpartition('@')
+    host, _, tld = domain.rpartition('.')
+    if not (
+        local and host
+        and len(tld) >= 2 and tld.isascii() and tld.isalpha()
+        and _only_chars(local, _EMAIL_LOCAL_CHARS)
+        and _only_chars(host, _EMAIL_DOMAIN_CHARS)
+    ):
+        return False, "Invalid email address."
+    return True, None
+
+# Username rules as (predicate, message) pairs, cheapest first
+_USERNAME_CHECKS = (
+    (lambda username: len(username) >= 3,
+     "Username must be at least 3 characters."),
+    (lambda username: _only_chars(username, _USERNAME_CHARS),
+     "Username can only contain letters, numbers, underscores, and hyphens."),
+)
+
+def _first_failure(checks, value):
+    """Return the message of the first (predicate, message) check value fails, or None."""
+    for predicate, message in checks:
+        if not predicate(value):
+            return message
+    return None
 
 def validate_username(username):
     """
@@ -86,17 +193,10 @@ def validate_username(username):
         username (str): The username to validate
         
     Returns:
-        bool: True if valid, False otherwise
+        tuple: (True, None) if valid, otherwise (False, the error message)
     """
-    if len(username) < 3:
-        print("Username must be at least 3 characters.")
-        return False
-    
-    if not re.match(r'^[a-zA-Z0-9_-]+$', username):
-        print("Username can only contain letters, numbers, underscores, and hyphens.")
-        return False
-        
-    return True
+    message = _first_failure(_USERNAME_CHECKS, username)
+    return message is None, message
 
 def validate_datetime(time_str):
     """
@@ -106,42 +206,43 @@ def validate_datetime(time_str):
         time_str (str): The datetime string to validate
         
     Returns:
-        bool: True if valid, False otherwise
+        tuple: (True, None) if valid, otherwise (False, the error message)
     """
     try:
-        datetime.strptime(time_str, "%Y-%m-%dT%H:%M")
-        return True
+        parse_datetime(time_str)
+        return True, None
     except ValueError:
-        print("Invalid date format. Use YYYY-MM-DDTHH:MM")
-        return False
+        return False, "Invalid date format. Use YYYY-MM-DDTHH:MM"
 
 def validate_integer(value, min_val=None, max_val=None):
     """
     Validate an integer.
     
     Args:
-        value (str): The value to validate
+        value (str or int): The value to validate
         min_val (int, optional): The minimum allowed value
         max_val (int, optional): The maximum allowed value
         
     Returns:
-        bool: True if valid, False otherwise
+        tuple: (True, None) if valid, otherwise (False, the error message)
     """
-    try:
-        num = int(value)
+    if isinstance(value, int):
+        num = value
+    else:
+        # Check the digits first so int() cannot fail; no exception on bad input
+        text = value.strip()
+        digits = text[1:] if text[:1] in ('+', '-') else text
+        if not (digits.isascii() and digits.isdigit()):
+            return False, "Please enter a valid number."
+        num = int(text)
+    
+    if min_val is not None and num < min_val:
+        return False, f"Value must be at least {min_val}."
         
-        if min_val is not None and num < min_val:
-            print(f"Value must be at least {min_val}.")
-            return False
-            
-        if max_val is not None and num > max_val:
-            print(f"Value must be at most {max_val}.")
-            return False
-            
-        return True
-    except ValueError:
-        print("Please enter a valid number.")
-        return False
+    if max_val is not None and num > max_val:
+        return False, f"Value must be at most {max_val}."
+        
+    return True, None
 
 def format_datetime(dt):
     """
@@ -154,26 +255,195 @@ def format_datetime(dt):
         str: The formatted datetime
     """
     if isinstance(dt, str):
-        try:
-            # Try to parse it as a datetime string
-            dt_obj = parse_datetime(dt)
-            return dt_obj.strftime("%Y-%m-%d %H:%M")
-        except ValueError:
-            # If parsing fails, return the string as-is
-            return dt
+        return _format_str(dt)
     elif dt:
         # If it's a datetime object, format it
-        return dt.strftime("%Y-%m-%d %H:%M")
+        return dt.strftime(_DISPLAY_FMT)
     return ""
 
+@functools.lru_cache(maxsize=2048)
+def _format_str(dt):
+    """
+    Format a datetime string for display; cached, as listings repeat timestamps.
+    
+    Args:
+        dt (str): The datetime string to format
+        
+    Returns:
+        str: The formatted datetime, or dt itself if it cannot be parsed
+    """
+    try:
+        # Try to parse it as a datetime string
+        fixed = _parse_fixed(dt)
+        dt_obj = fixed or parse_datetime(dt)
+    except ValueError:
+        # If parsing fails, return the string as-is
+        return dt
+    if fixed is not None:
+        # A valid, zero-padded YYYY-MM-DDTHH:MM differs from the display
+        # format only in the T, so skip strftime
+        return dt[:10] + ' ' + dt[11:]
+    return dt_obj.strftime(_DISPLAY_FMT)
+
+def _parse_fixed(dt_str):
+    """
+    Parse a YYYY-MM-DDTHH:MM string by slicing instead of with strptime.
+    
+    Args:
+        dt_str (str): The datetime string to parse
+        
+    Returns:
+        datetime: The parsed datetime, or None if the string has another shape
+    """
+    digits = dt_str[:4] + dt_str[5:7] + dt_str[8:10] + dt_str[11:13] + dt_str[14:]
+    if (len(dt_str) == 16 and dt_str[4] == '-' and dt_str[7] == '-'
+            and dt_str[10] == 'T' and dt_str[13] == ':'
+            and digits.isascii() and digits.isdigit()):
+        # datetime() raises ValueError for out-of-range fields, as strptime does
+        return datetime(int(dt_str[:4]), int(dt_str[5:7]), int(dt_str[8:10]),
+                        int(dt_str[11:13]), int(dt_str[14:]))
+    return None
+
+@functools.lru_cache(maxsize=1024)
 def parse_datetime(dt_str):
     """
     Parse a datetime string.
     
+    Results are kept in a bounded cache for callers that parse the same
+    string more than once in a process; a CLI command parses each input
+    once. datetime objects are immutable, so sharing them is safe.
+    
     Args:
         dt_str (str): The datetime string to parse
         
     Returns:
         datetime: The parsed datetime
     """
-    return datetime.strptime(dt_str, "%Y-%m-%dT%H:%M")
+    dt = _parse_fixed(dt_str)
+    if dt is None:
+        # Other shapes strptime accepts, e.g. single-digit fields
+        dt = _STRPTIME(dt_str, _DT_FMT)
+    return dt
+
+def print_page_footer(page, page_size, total, fmt="simple"):
+    """
+    Print which page of a listing was shown, if there is more than one page.
+    
+    Args:
+        page (int): The page shown, starting at 1
+        page_size (int): The number of rows per page
+        total (int): The total number of rows
+        fmt (str): The table format; nothing is printed for tsv
+    """
+    if fmt == "simple" and total > page_size:
+        pages = -(-total // page_size)
+        print(f"\nPage {page} of {pages} ({total} total)")
+
+def _cell(value, width=None):
+    """Convert a table cell to text, cutting it to width characters plus '...'."""
+    text = "" if value is None else str(value)
+    if width is not None and len(text) > width:
+        return text[:width] + "..."
+    return text
+
+# Escapes for backslashes and the characters that would break a tsv row
+_TSV_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+def _tsv_cell(value):
+    """Convert a table cell to text for tsv output, escaping tabs and line breaks."""
+    return _cell(value).translate(_TSV_ESCAPES)
+
+def _simple_lines(headers, sample, rest=()):
+    """
+    Yield the lines of a table in tabulate's "simple" layout.
+    
+    Column widths and alignment come from the sample rows, so the rest can
+    be streamed without holding them in memory; a wider cell in the rest
+    pushes its row out of line rather than being cut. Numbers are
+    right-aligned and everything else is left-aligned, per column as
+    decided by the first row. Columns are at least two characters wider
+    than their header.
+    """
+    widths = [len(h) + 2 for h in headers]
+    for row in sample:
+        for i, value in enumerate(row):
+            width = len(_cell(value))
+            if width > widths[i]:
+                widths[i] = width
+    numeric = [isinstance(v, (int, float)) for v in sample[0]]
+    
+    def line(texts):
+        return "  ".join(
+            t.rjust(w) if num else t.ljust(w)
+            for t, w, num in zip(texts, widths, numeric)
+        ).rstrip() + "\n"
+    
+    yield line(headers)
+    yield "  ".join("-" * w for w in widths) + "\n"
+    for row in itertools.chain(sample, rest):
+        yield line([_cell(v) for v in row])
+
+def stream_table(headers, rows, fmt="simple", max_widths=None):
+    """
+    Write rows to stdout as a table, consuming them as they are produced.
+    
+    Up to 500 rows are laid out by tabulate. Beyond that, column widths are
+    taken from the first 500 rows and the rest are written as they arrive.
+    
+    Args:
+        headers (list): The column headers
+        rows (iterable): The rows, each a sequence of cell values
+        fmt (str): "simple" for an aligned table, or "tsv" for tab-separated values
+        max_widths (dict, optional): Column index to the number of characters
+            shown before the cell is cut off with '...'
+    """
+    if max_widths:
+        rows = (
+            [_cell(v, max_widths[i]) if i in max_widths else v for i, v in enumerate(row)]
+            for row in rows
+        )
+    
+    if fmt == "tsv":
+        sys.stdout.write("\t".join(headers) + "\n")
+        sys.stdout.writelines("\t".join(map(_tsv_cell, row)) + "\n" for row in rows)
+        return
+    
+    rows = iter(rows)
+    sample = list(itertools.islice(rows, _TABULATE_MAX_ROWS + 1))
+    if len(sample) > _TABULATE_MAX_ROWS:
+        sys.stdout.writelines(_simple_lines(headers, sample, rows))
+        return
+    
+    from tabulate import tabulate
+    sys.stdout.write(tabulate(sample, headers=headers, tablefmt="simple") + "\n")
+
+def nonempty(rows):
+    """
+    Check whether an iterable of rows has any, reading only the first.
+    
+    Args:
+        rows (iterable): The rows, e.g. from db.iter_query
+        
+    Returns:
+        iterator: All of the rows, or None if there are none
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return None
+    return itertools.chain((first,), rows)
+
+def print_table(title, headers, rows, fmt="simple", max_widths=None):
+    """
+    Print a titled table, or just the tab-separated rows for fmt="tsv".
+    
+    Args:
+        title (str): The title shown above the table
+        headers (list): The column headers
+        rows (iterable): The rows, each a sequence of cell values
+        fmt (str): One of TABLE_FORMATS
+        max_widths (dict, optional): See stream_table
+    """
+    if fmt == "simple":
+        sys.stdout.write(f"\n=== {title} ===\n")
+    stream_table(headers, rows, fmt, max_widths)
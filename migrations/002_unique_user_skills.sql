@@ -0,0 +1 @@
+CREATE UNIQUE INDEX uq_user_skills_user_id_skill_id ON user_skills (user_id, skill_id);
@@ -0,0 +1,6 @@
+CREATE INDEX ix_service_requests_requester_id_time ON service_requests (requester_id, time DESC);
+CREATE INDEX ix_service_requests_provider_id_time ON service_requests (provider_id, time DESC);
+CREATE INDEX ix_reviews_reviewee_id_created_at ON reviews (reviewee_id, created_at DESC, rating);
+CREATE INDEX ix_reviews_reviewer_id_created_at ON reviews (reviewer_id, created_at DESC);
+CREATE INDEX ix_reviews_service_request_id ON reviews (service_request_id);
+CREATE INDEX ix_user_skills_skill_id_user_id ON user_skills (skill_id, user_id);
@@ -19,6 +19,9 @@ CREATE TABLE user_skills (
   skill_id INT REFERENCES skills(id) ON DELETE CASCADE
 );
 
+CREATE UNIQUE INDEX uq_user_skills_user_id_skill_id ON user_skills (user_id, skill_id);
+CREATE INDEX ix_user_skills_skill_id_user_id ON user_skills (skill_id, user_id);
+
 CREATE TABLE service_requests (
   id SERIAL PRIMARY KEY,
   requester_id INT REFERENCES users(id) ON DELETE CASCADE,
@@ -33,6 +36,9 @@ CREATE TABLE service_requests (
   updated_at TIMESTAMP DEFAULT NOW()
 );
 
+CREATE INDEX ix_service_requests_requester_id_time ON service_requests (requester_id, time DESC);
+CREATE INDEX ix_service_requests_provider_id_time ON service_requests (provider_id, time DESC);
+
 CREATE TABLE reviews (
   id SERIAL PRIMARY KEY,
   service_request_id INT REFERENCES service_requests(id) ON DELETE CASCADE,
@@ -42,3 +48,7 @@ CREATE TABLE reviews (
   comments TEXT,
   created_at TIMESTAMP DEFAULT NOW()
 );
+
+CREATE INDEX ix_reviews_reviewee_id_created_at ON reviews (reviewee_id, created_at DESC, rating);
+CREATE INDEX ix_reviews_reviewer_id_created_at ON reviews (reviewer_id, created_at DESC);
+CREATE INDEX ix_reviews_service_request_id ON reviews (service_request_id);